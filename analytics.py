@@ -0,0 +1,89 @@
+import plotly.graph_objs as go                                 # Import Plotly's graph objects for advanced data visualization
+import pandas as pd                                            # Import Pandas for data analysis and manipulation
+import numpy as np                                             # Import NumPy for numerical operations and array processing
+from numpy.lib.stride_tricks import sliding_window_view        # Import sliding_window_view to build rolling windows without copying data
+import warnings                                                # Import warnings to silence expected warnings on empty slices
+from concurrent.futures import ThreadPoolExecutor              # Import ThreadPoolExecutor to retrieve several pairs at the same time
+
+
+# Number of candles used to compute the correlation matrix shown in the heatmap
+CORRELATION_WINDOW = 30
+
+# Maximum number of currency pairs whose data is retrieved at the same time, since the calls themselves are spaced out
+# to respect the Kraken rate limits (see graphs.query_public), a few workers are enough to overlap their latency
+FETCH_WORKERS = 4
+
+
+# Retrieves the data of several currency pairs concurrently, returning the frames retrieved and the pairs that failed
+def fetch_frames(fetch, pairs, workers=FETCH_WORKERS):
+    with ThreadPoolExecutor(max_workers=max(min(workers, len(pairs)), 1)) as executor:
+        results = list(executor.map(fetch, pairs))
+    frames = {pair: df for pair, df in zip(pairs, results) if df is not None and not df.empty}
+    failed = [pair for pair in pairs if pair not in frames]
+    return frames, failed
+
+# Aligns the close prices of several currency pairs into a single matrix on a common time grid
+def align_closes(frames, interval):
+    # Join every close series into one DataFrame, skipping pairs whose data could not be retrieved
+    series = {pair: df['Close'] for pair, df in frames.items() if df is not None and not df.empty}
+    if not series:  # Return an empty result when no pair could be retrieved
+        return pd.DatetimeIndex([]), [], np.empty((0, 0))
+    closes = pd.concat(series, axis=1)
+
+    # Resamples all the columns at once to the specified interval and carries the last known price over missing candles
+    closes = closes.resample(f'{interval}T').last().ffill()
+    return closes.index, list(closes.columns), closes.to_numpy(dtype=float)
+
+# Computes the logarithmic returns between consecutive rows of a matrix of prices (one row less than the prices)
+def log_returns(closes):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(np.log(closes), axis=0)
+
+# Computes the correlation matrix of every pair against every other pair over rolling windows of returns
+def rolling_correlation(returns, window, step=1):
+    # Windows ending every 'step' rows, always including the latest one, with shape (windows, pairs, window)
+    windows = sliding_window_view(returns, window, axis=0)
+    windows = windows[(len(windows) - 1) % step::step]
+
+    # Standardize every window so that a single batched matrix product yields the correlation coefficients
+    centered = windows - windows.mean(axis=2, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = centered / np.sqrt((centered ** 2).sum(axis=2, keepdims=True))
+    return np.clip(scaled @ scaled.transpose(0, 2, 1), -1, 1)  # Array of shape (windows, pairs, pairs)
+
+# Computes the return of each pair over the last 'window' candles relative to the average return of all the pairs
+def relative_strength(closes, window):
+    log_closes = np.log(closes)
+    momentum = np.full_like(log_closes, np.nan)
+    momentum[window:] = log_closes[window:] - log_closes[:-window]
+
+    # Rows without any valid momentum produce a harmless warning that is silenced
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return momentum - np.nanmean(momentum, axis=1, keepdims=True)
+
+# Computes the cross-sectional standard deviation of the returns of all the pairs at each time step
+def returns_dispersion(returns):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanstd(returns, axis=1)
+
+
+# Creates a heatmap displaying the correlation matrix of several currency pairs
+def correlation_heatmap(correlation, pairs):
+    try:
+        data = [go.Heatmap(z=correlation, x=pairs, y=pairs, zmin=-1, zmax=1, colorscale='RdBu', colorbar=dict(title='Correlation'))]
+
+        # Define the layout for the graph, keeping the first pair on top
+        layout = go.Layout(title='Correlation of the Returns between Currency Pairs',
+                           yaxis=dict(autorange='reversed'))
+
+        fig = go.Figure(data=data, layout=layout)  # Create a Figure object with the heatmap data
+        fig.layout.height = 500
+        fig.layout.width = 650
+        return fig  # Return the Figure object for plotting
+
+    # Handle exceptions in chart creation and return an empty figure in case of an error
+    except Exception as e:
+        print(f"An error occurred while creating the correlation heatmap: {e}")
+        return go.Figure()  # Return an empty Plotly Figure object if an error occurs
@@ -1,8 +1,10 @@
 import streamlit as st                         # Import Streamlit for creating web applications
 from streamlit_option_menu import option_menu  # Import option_menu for creating option menus in Streamlit apps
 from plotly.subplots import make_subplots      # Import make_subplots from Plotly for creating combined plots
-from graphs import Graph                       # Import Graph class from the 'graphs' module for graph operations
+from graphs import Graph, compact_figure, obtain_function, KRAKEN_URL  # Import Graph class, the figure encoder, the data retrieval and the API URL from the 'graphs' module
+import analytics                               # Import the 'analytics' module for cross-pair correlation analysis
 import datetime                                # Import datetime for date and time operations
+import numpy as np                             # Import NumPy for numerical operations on the analytics results
 from style import style                        # Import the style function from the 'style' module to customize the app
 
 
@@ -10,7 +12,7 @@ import requests  # Import the requests library for HTTP request handling
 
 # Retrieves all available currency pairs from the Kraken API
 def get_kraken_pairs():
-    url = 'https://api.kraken.com/0/public/AssetPairs'  # Endpoint URL for fetching Kraken currency pairs
+    url = f'{KRAKEN_URL}/0/public/AssetPairs'           # Endpoint URL for fetching Kraken currency pairs
     response = requests.get(url)                        # Send a GET request to the Kraken API
     response_json = response.json()                     # Convert the response to JSON format
     pairs = response_json['result'].keys()              # Extract currency pair identifiers from the JSON data
@@ -126,8 +128,8 @@ class Front:
     def display_graph(self):
 
         # Horizontal menu for selecting the type of graph to display
-        self.graph_selected = option_menu(None, ["Candlestick", "Stochastic", "Combined", "Strategy"],
-                                                icons=['bar-chart-line', 'activity', "layers"],
+        self.graph_selected = option_menu(None, ["Candlestick", "Stochastic", "Combined", "Strategy", "Correlation"],
+                                                icons=['bar-chart-line', 'activity', "layers", "graph-up", "grid-3x3"],
                                                 menu_icon="cast", default_index=0, orientation="horizontal")
 
         if self.graph_selected != None:
@@ -142,17 +144,19 @@ class Front:
                 st.markdown('&nbsp;'*30 + 'Please, choose a &nbsp;*time interval*&nbsp; to graph the corresponding data', unsafe_allow_html=True)
                 return  # End the execution of this method
 
-        graph = Graph(pair=self.currency_pair, interval=self.time_interval, divisor=find_largest_divisor(self.time_interval), since=self.since, until=self.until)
-        ohlc_df = graph.obtain_data()
-        candlestick, stochastic = graph.candlestick(ohlc_df), graph.stochastic(ohlc_df)
+        # The data of the selected pair is only retrieved for the graphs that display it
+        if self.graph_selected != "Correlation":
+            graph = Graph(pair=self.currency_pair, interval=self.time_interval, divisor=find_largest_divisor(self.time_interval), since=self.since, until=self.until)
+            ohlc_df = graph.obtain_data()
 
         if self.graph_selected == "Candlestick":
-            fig = candlestick
+            fig = graph.candlestick(ohlc_df)
 
         elif self.graph_selected == "Stochastic":
-            fig = stochastic
+            fig = graph.stochastic(ohlc_df)
 
         elif self.graph_selected == "Combined":
+            candlestick, stochastic = graph.candlestick(ohlc_df), graph.stochastic(ohlc_df)
             fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.1, row_heights=[0.8, 0.2], specs=[[{"secondary_y": True}], [{}]])
             fig.add_trace(candlestick['data'][0], row=1, col=1, secondary_y=True)
             fig.add_trace(candlestick['data'][1], row=1, col=1, secondary_y=False)
@@ -160,8 +164,8 @@ class Front:
             fig.add_trace(candlestick['data'][3], row=1, col=1, secondary_y=True)
             fig.add_trace(stochastic['data'][0], row=2, col=1)
             fig.add_trace(stochastic['data'][1], row=2, col=1)
-            fig.add_trace(stochastic['data'][2], row=2, col=1)
-            fig.add_trace(stochastic['data'][3], row=2, col=1)
+            for shape in stochastic.layout.shapes:  # Threshold lines are layout shapes, so they are copied onto the lower subplot
+                fig.add_hline(y=shape.y0, line=shape.line, row=2, col=1)
 
             fig.update_layout(
                 title='Candlestick Graph with Moving Average and Stochastic Oscillator',
@@ -179,7 +183,41 @@ class Front:
                 st.write("There are no buy signals")
                 return
             
-        fig_dict = fig.to_dict()   # Convert the figure to a dictionary for Streamlit to display
+        elif self.graph_selected == "Correlation":
+            # Multiselect for choosing the currency pairs compared against the selected one
+            pairs = st.multiselect('Pairs to compare', options=kraken_pairs, default=[self.currency_pair])
+            if len(pairs) < 2:
+                st.write("Please, select at least two currency pairs to compare")
+                return
+
+            # Retrieve the data of every pair concurrently and align the close prices into a single matrix
+            args = (self.time_interval, find_largest_divisor(self.time_interval), self.since, self.until)
+            frames, failed = analytics.fetch_frames(lambda pair: obtain_function(pair, *args), pairs)
+            for pair in failed:
+                obtain_function.clear(pair, *args)  # Forget the failed retrievals so they are retried on the next run
+            if failed:
+                st.write(f"The data of the following pairs could not be retrieved: *{', '.join(failed)}*")
+
+            _, pairs, closes = analytics.align_closes(frames, self.time_interval)
+            if len(pairs) < 2:
+                st.write("At least two currency pairs with data are needed to compute the correlation")
+                return
+            returns = analytics.log_returns(closes)
+            if len(returns) < 2:
+                st.write("There is not enough data to compute the correlation")
+                return
+
+            # Correlation over the latest window of returns and dispersion of those returns
+            window = min(analytics.CORRELATION_WINDOW, len(returns))
+            correlation = analytics.rolling_correlation(returns[-window:], window)[-1]
+            dispersion = analytics.returns_dispersion(returns[-window:])
+            strength = analytics.relative_strength(closes, window)[-1]
+            fig = analytics.correlation_heatmap(correlation, pairs)
+            if not np.isnan(strength).all():
+                st.write(f"Over the last {window} candles, the strongest pair is *{pairs[np.nanargmax(strength)]}* " +
+                         f"and the weakest is *{pairs[np.nanargmin(strength)]}*, with an average dispersion of returns of {np.nanmean(dispersion):.4f}.")
+
+        fig_dict = compact_figure(fig)  # Convert the figure to a dictionary with binary timestamps for Streamlit to display
         st.plotly_chart(fig_dict)  # Use Streamlit to display the plotly graph
 
     
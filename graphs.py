@@ -4,6 +4,35 @@ from plotly.subplots import make_subplots   # Import make_subplots from Plotly f
 import pandas as pd                         # Import Pandas for data analysis and manipulation
 import numpy as np                          # Import NumPy for numerical operations and array processing
 import streamlit as st                      # Import Streamlit for creating web applications
+import base64                               # Import base64 to encode data arrays as compact binary buffers
+import os                                   # Import os to read the environment configuration
+import threading                            # Import threading to space out the calls made from several threads
+import time                                 # Import time to wait between calls to the Kraken API
+
+
+# Base URL of the Kraken API, which can be pointed at a local stand-in through the KRAKEN_API_URL environment variable
+KRAKEN_URL = os.environ.get('KRAKEN_API_URL', 'https://api.kraken.com')
+
+# Minimum number of seconds between two calls to the Kraken API, which limits the public calls each IP address can make
+KRAKEN_CALL_INTERVAL = float(os.environ.get('KRAKEN_CALL_INTERVAL', 1.0))
+
+# Number of times a rate limited call is retried, waiting twice as long before each new attempt
+KRAKEN_RETRIES = 4
+
+# Errors returned by the Kraken API when too many calls are made
+RATE_LIMIT_ERRORS = ('EGeneral:Too many requests', 'EAPI:Rate limit exceeded')
+
+call_lock = threading.Lock()  # Lock shared by every thread calling the Kraken API
+next_call = 0.0               # Earliest time, according to time.monotonic, at which the next call can be made
+
+# Number of points above which line charts are drawn with WebGL instead of SVG, below Kraken's limit of 720 candles per query
+WEBGL_THRESHOLD = 500
+
+# Trace attributes holding the data arrays sent to the browser as typed arrays
+ARRAY_ATTRIBUTES = ('x', 'y', 'open', 'high', 'low', 'close')
+
+# Trace types that accept a regular time grid as a start point and a step (x0 and dx) instead of a full array
+GRID_TRACES = ('scatter', 'scattergl', 'bar')
 
 
 # This function aggregates data into custom time intervals that are not natively provided by the Kraken API to make queries
@@ -18,6 +47,79 @@ def aggregate_intervals(interval, df):
                                                      'Volume': 'sum'})
     return resampled_df
 
+# Builds a line chart, switching to its WebGL version when the number of points is large enough to slow down SVG rendering
+def line_trace(x, y, **kwargs):
+    trace = go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+# Reads a data array from a figure dictionary, where plotly may already have stored it as a typed array
+def as_array(values):
+    if isinstance(values, dict) and 'bdata' in values:
+        return np.frombuffer(base64.b64decode(values['bdata']), dtype=values['dtype'])
+    return np.asarray(values)
+
+# Encodes an array of numbers or timestamps as a base64 typed array with the smallest type that keeps it readable on a chart
+# Timestamps need float64 milliseconds, small integers fit in one byte and other numbers use float32 (about 7 significant digits)
+# unless they fall outside its range. Returns None for arrays that cannot be encoded
+def typed_array(values):
+    array = as_array(values)
+    if array.dtype.kind == 'M':
+        array = array.astype('datetime64[ms]').astype('int64').astype('f8')
+    elif array.dtype.kind in 'biu' and array.size and array.min() >= 0 and array.max() <= 255:
+        array = array.astype('u1')
+    elif array.dtype.kind in 'iuf':
+        single = array.astype('f4')
+        array = single if np.array_equal(np.isfinite(single), np.isfinite(array)) else array.astype('f8')
+    else:
+        return None
+    return {'dtype': array.dtype.str.lstrip('<|='), 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+# Converts a figure to a dictionary with compact data: timestamps on a regular grid are sent as a start and a step,
+# and every other numeric or time array is sent as a binary typed array instead of a JSON list
+def compact_figure(fig):
+    fig_dict = fig.to_dict()
+    layout = fig_dict.setdefault('layout', {})
+    for trace in fig_dict.get('data', []):
+        for attribute in ARRAY_ATTRIBUTES:
+            if attribute not in trace:
+                continue
+            array = as_array(trace[attribute])
+            if array.dtype.kind == 'M':
+                # Numbers on their own would be drawn on a linear axis, so the axis holding the timestamps is declared as a date axis
+                axis = trace.get(f'{attribute}axis', attribute)
+                layout.setdefault(f'{axis[0]}axis{axis[1:]}', {})['type'] = 'date'
+
+                # Candles at a fixed interval only need the first timestamp and the interval, when the trace type allows it
+                steps = np.diff(array).astype('timedelta64[ms]').astype('int64')
+                if trace.get('type') in GRID_TRACES and attribute in ('x', 'y') and len(steps) and (steps == steps[0]).all():
+                    del trace[attribute]
+                    trace[f'{attribute}0'] = np.datetime_as_string(array[0], unit='ms')
+                    trace[f'd{attribute}'] = int(steps[0])
+                    continue
+            encoded = typed_array(array)
+            if encoded is not None:
+                trace[attribute] = encoded
+
+        # Numeric marker colors, such as the rising and falling candles of the volume bars, are encoded as well
+        marker = trace.get('marker', {})
+        if 'color' in marker and as_array(marker['color']).dtype.kind in 'biuf':
+            marker['color'] = typed_array(marker['color'])
+    return fig_dict
+
+# Queries a public method of the Kraken API, spacing out the calls and retrying with backoff when rate limited
+def query_public(k, method, data):
+    global next_call
+    for attempt in range(KRAKEN_RETRIES + 1):
+        # Wait until the interval since the previous call has passed, holding the lock so that calls go out one at a time
+        with call_lock:
+            time.sleep(max(next_call - time.monotonic(), 0))
+            next_call = time.monotonic() + KRAKEN_CALL_INTERVAL
+
+        response = k.query_public(method, data)
+        if attempt == KRAKEN_RETRIES or not any(error in RATE_LIMIT_ERRORS for error in response['error']):
+            return response
+        time.sleep(KRAKEN_CALL_INTERVAL * 2 ** attempt)  # Back off before trying again
+
 # Retrieves trading data from the Kraken API and stores it in a Pandas DataFrame
 @st.cache_data(ttl=300)  # Decorator to cache the data in Streamlit, with a time-to-live (TTL) of 300 seconds
 def obtain_function(pair, interval, divisor, since, until):
@@ -25,9 +127,10 @@ def obtain_function(pair, interval, divisor, since, until):
     # Initializing a Kraken API client and querying data within a try-except block
     try:
         k = krakenex.API()  # Initialize the Kraken client
+        k.uri = KRAKEN_URL  # Send the queries to the configured Kraken API
         
         # Query for OHLC data for the specified currency pair, interval and start date
-        response = k.query_public('OHLC', {'pair':pair, 'interval':divisor, 'since':since})
+        response = query_public(k, 'OHLC', {'pair':pair, 'interval':divisor, 'since':since})
         if response['error']:  # Check and raise an exception if an error exists in the response
             print(f"There was an error with the API call")
             raise Exception(response['error'])
@@ -99,20 +202,20 @@ class Graph:
     def candlestick(df):
         try:
 
-            colors = ['#008080' if close >= open else 'red' for open, close in zip(df['Open'], df['Close'])]
+            rising = (df['Close'] >= df['Open']).astype(int).to_numpy()  # 1 for rising candles and 0 for falling ones, mapped to colors below
             fig = make_subplots(specs=[[{"secondary_y": True}]])
 
             # Include candlestick with range selector
             fig.add_trace(go.Candlestick(x=df.index, open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'], name='', legendgroup='group', legendrank=1), secondary_y=True)
             
             # Bar diagram displaying the Volume data
-            fig.add_trace(go.Bar(x=df.index, y=df['Volume'], marker_color=colors, opacity=0.25, showlegend=False), secondary_y=False)
+            fig.add_trace(go.Bar(x=df.index, y=df['Volume'], marker=dict(color=rising, colorscale=[[0, 'red'], [1, '#008080']], cmin=0, cmax=1), opacity=0.25, showlegend=False), secondary_y=False)
             
             # Line chart displaying the computed SMA values
-            fig.add_trace(go.Scatter(x=df.index, y=df['SMA'], marker=dict(color='#0000FF'), opacity=0.35, name='SMA', legendgroup='group', legendrank=2), secondary_y=True)
+            fig.add_trace(line_trace(x=df.index, y=df['SMA'], marker=dict(color='#0000FF'), opacity=0.35, name='SMA', legendgroup='group', legendrank=2), secondary_y=True)
             
             # Line chart displaying the computed EMA values
-            fig.add_trace(go.Scatter(x=df.index, y=df['EMA'], marker=dict(color='#FF0000'), opacity=0.35, name='EMA', legendgroup='group', legendrank=3), secondary_y=True)
+            fig.add_trace(line_trace(x=df.index, y=df['EMA'], marker=dict(color='#FF0000'), opacity=0.35, name='EMA', legendgroup='group', legendrank=3), secondary_y=True)
             
             fig.layout.yaxis2.showgrid = False
             fig.layout.title = 'Candlestick Graph with Volume and Moving Averages'
@@ -131,22 +234,21 @@ class Graph:
     def stochastic(df):
         try:
             data = [# The first plot is a line chart for the '%D' line of the stochastic oscillator
-                    go.Scatter(x=df.index, y=df['%D'], name='Smoothed Stochastic', marker=dict(color='#b2b2b2'), legendgroup='group', legendrank=5),
+                    line_trace(x=df.index, y=df['%D'], name='Smoothed Stochastic', marker=dict(color='#b2b2b2'), legendgroup='group', legendrank=5),
                     
                     # The second plot is a line chart for the '%K' line of the stochastic oscillator
-                    go.Scatter(x=df.index, y=df['%K'], name='Stochastic Oscillator', marker=dict(color='#4c4c4c'), legendgroup='group', legendrank=4),
-
-                    # Horizontal line at 20%
-                    go.Scatter(x=df.index, y=[20]*len(df.index), mode='lines', name='20% threshold', line=dict(color='purple', width=1, dash='dash'), showlegend=False),
-
-                    # Horizontal line at 80%
-                    go.Scatter(x=df.index, y=[80]*len(df.index), mode='lines', name='80% threshold', line=dict(color='purple', width=1, dash='dash'), showlegend=False)]
+                    line_trace(x=df.index, y=df['%K'], name='Stochastic Oscillator', marker=dict(color='#4c4c4c'), legendgroup='group', legendrank=4)]
 
             # Define the layout for the plotly figure, setting titles and axis labels
             layout = go.Layout(title='Stochastic Oscillator with its Smoothed Version',
                                yaxis=dict(title='Value (%)', range=[0,100]))  # Label for the y-axis
 
             fig = go.Figure(data=data, layout=layout)  # Create a Figure object with the candlestick data
+
+            # Horizontal lines at 20% and 80%, drawn as layout shapes so no per-point data is needed
+            for threshold in (20, 80):
+                fig.add_hline(y=threshold, line=dict(color='purple', width=1, dash='dash'))
+
             fig.layout.height = 250
             return fig  # Return the Figure object for plotting
 
@@ -208,7 +310,7 @@ class Graph:
             # Create a list of Scatter plots for the profit graph
             data = [
                 # Line plot for cumulative profit over time
-                go.Scatter(x=df.index, y=df['Profit'].cumsum(), name='Profit', marker=dict(color='#0d0c52')),
+                line_trace(x=df.index, y=df['Profit'].cumsum(), name='Profit', marker=dict(color='#0d0c52')),
 
                 # Marker plot for points where buy signals occur
                 go.Scatter(x=df[df['Buy_Signal']].index, y=df['Profit'].cumsum()[df['Buy_Signal']], mode='markers', marker=dict(color='#05e3a0', size=10), name='Buy Signal'),
@@ -0,0 +1,304 @@
+import argparse                                         # Import argparse to read the load test options from the command line
+import contextlib                                       # Import contextlib to keep the app's own output away from the report
+import gc                                               # Import gc to collect garbage before measuring retained memory
+import json                                             # Import json to build the API responses and the report
+import os                                               # Import os to point the application at the stand-in
+import random                                           # Import random to decide which requests are rate limited
+import sys                                              # Import sys to reach the loaded modules and the error output
+import threading                                        # Import threading to serve the stand-in and count calls safely
+import time                                             # Import time to simulate latency and measure durations
+import tracemalloc                                      # Import tracemalloc to measure the memory kept by each session
+import urllib.parse                                     # Import urllib.parse to read the query parameters
+import zlib                                             # Import zlib to derive a reproducible seed from each pair name
+from collections import Counter                         # Import Counter to count the upstream calls per endpoint
+from concurrent.futures import ThreadPoolExecutor       # Import ThreadPoolExecutor to run many sessions concurrently
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Import the standard HTTP server for the stand-in
+
+import numpy as np                                      # Import NumPy to generate the candles and compute percentiles
+
+
+# Tabs of the option menu visited by every simulated session
+TABS = ("Candlestick", "Stochastic", "Combined", "Strategy", "Correlation")
+
+# Session state key used to choose the tab shown by the option menu during a load test
+TAB_KEY = 'load_test_tab'
+
+
+# The class KrakenStandIn serves Kraken's public OHLC and AssetPairs endpoints locally with configurable behaviour
+class KrakenStandIn:
+
+    # Constructor for initializing a KrakenStandIn instance
+    def __init__(self, latency=0.05, rate_limit=0.0, candles=720, pairs=50, port=0, seed=0):
+        self.latency = latency        # Seconds waited before answering each request
+        self.rate_limit = rate_limit  # Probability of answering a request with a rate limit error
+        self.candles = candles        # Number of candles returned by each OHLC request
+        self.pairs = ['XETHZUSD', 'XXBTZUSD'] + [f'PAIR{i:03d}ZUSD' for i in range(max(pairs - 2, 0))]
+        self.calls = Counter()        # Number of requests received per endpoint
+        self.rate_limited = 0         # Number of requests answered with a rate limit error
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    # Starts serving requests in a background thread
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    # Stops serving requests and releases the port
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # Builds the body of a response to the given endpoint, counting the call and applying latency and rate limits
+    def respond(self, endpoint, params):
+        with self._lock:
+            self.calls[endpoint] += 1
+            limited = self._random.random() < self.rate_limit
+            self.rate_limited += limited
+        time.sleep(self.latency)
+
+        if limited:
+            return {'error': ['EAPI:Rate limit exceeded'], 'result': {}}
+        if endpoint == 'AssetPairs':
+            return {'error': [], 'result': {pair: {'altname': pair} for pair in self.pairs}}
+        if endpoint == 'OHLC':
+            return self.ohlc(params.get('pair', 'XETHZUSD'), int(params.get('interval') or 1), params.get('since'))
+        return {'error': [f'EGeneral:Unknown method {endpoint}'], 'result': {}}
+
+    # Generates reproducible OHLC candles for a pair as a random walk ending at the current time
+    def ohlc(self, pair, interval, since=None):
+        step = interval * 60
+        end = int(time.time()) // step * step
+        times = end - step * np.arange(self.candles)[::-1]
+
+        rng = np.random.default_rng(zlib.crc32(pair.encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, self.candles)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.005, self.candles))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.005, self.candles))
+        volume = rng.uniform(1, 100, self.candles)
+
+        # Kraken sends prices and volumes as strings with the layout [time, open, high, low, close, vwap, volume, count]
+        rows = [[int(t), f'{o:.5f}', f'{h:.5f}', f'{l:.5f}', f'{c:.5f}', f'{c:.5f}', f'{v:.8f}', 1]
+                for t, o, h, l, c, v in zip(times, open_, high, low, close, volume)]
+        if since not in (None, '', 'None'):
+            rows = [row for row in rows if row[0] > float(since)]
+        return {'error': [], 'result': {pair: rows, 'last': int(end)}}
+
+    # Creates the request handler class bound to this stand-in
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                self._reply(url.path, urllib.parse.parse_qs(url.query))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode()
+                self._reply(urllib.parse.urlparse(self.path).path, urllib.parse.parse_qs(body))
+
+            def _reply(self, path, query):
+                params = {key: values[0] for key, values in query.items()}
+                body = json.dumps(stand_in.respond(path.rsplit('/', 1)[-1], params)).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep the load test output readable
+
+        return Handler
+
+
+# Creates a subclass of Streamlit's Runtime class that keeps one runtime installed while sessions run concurrently,
+# because every AppTest run installs its own global runtime and removes it when done, which breaks the other sessions.
+# Being a subclass, it still exposes every attribute of Runtime to the mocks AppTest builds from it
+def shared_runtime(runtime):
+
+    class SharedRuntimeMeta(type(runtime)):
+
+        # Installs the first runtime set by a session and ignores the rest, including the final reset to None
+        def __setattr__(cls, name, value):
+            if name != '_instance':
+                super().__setattr__(name, value)
+            elif value is not None and runtime._instance is None:
+                runtime._instance = value
+
+    return SharedRuntimeMeta('SharedRuntime', (runtime,), {})
+
+
+# Replaces the option menu, which cannot be clicked in a headless session, with the tab stored in the session state
+def scripted_option_menu(menu_title, options, default_index=0, **kwargs):
+    import streamlit as st
+    return st.session_state.get(TAB_KEY, options[default_index])
+
+
+# Drives one headless session through the pair selection, an interval button and every graph tab
+def run_session(app_path, pair, other_pair, interval, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(app_path, default_timeout=timeout)
+    latencies, errors = [], []
+
+    # Runs one interaction and records its latency and any error displayed by the app
+    def step(action):
+        start = time.perf_counter()
+        action()
+        latencies.append(time.perf_counter() - start)
+        errors.extend(element.value for element in app.error)
+
+    # A failing interaction, such as a pair missing after a rate limited AssetPairs call, ends the session
+    try:
+        step(app.run)
+        step(lambda: app.selectbox[0].select(pair).run())
+        step(lambda: app.button(key=f'button-{interval}').click().run())
+        for tab in TABS:
+            app.session_state[TAB_KEY] = tab
+            step(app.run)
+            if tab == "Correlation" and len(app.multiselect):
+                step(lambda: app.multiselect[0].select(other_pair).run())
+    except Exception as e:
+        errors.append(f"Session stopped: {e}")
+    return latencies, errors, app
+
+
+# Measures the memory retained by each session while several finished sessions are kept alive, once caches are warm
+def session_memory(app_path, choices, interval, timeout, count=5):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        apps = [run_session(app_path, choices[i], choices[i + 1], interval, timeout)[2] for i in range(count)]
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        del apps
+        return retained / count
+    finally:
+        tracemalloc.stop()
+
+
+# Runs the whole load test against a fresh stand-in and returns a report with the measured figures
+def load_test(sessions=20, concurrency=5, latency=0.05, rate_limit=0.0, candles=720, pairs=50,
+              interval='1h', timeout=60, app_path='main.py', memory_sessions=5, call_interval=None):
+    if min(sessions, concurrency, memory_sessions) < 1:
+        raise ValueError("sessions, concurrency and memory_sessions must be at least 1")
+
+    stand_in = KrakenStandIn(latency=latency, rate_limit=rate_limit, candles=candles, pairs=pairs).start()
+    previous_url = os.environ.get('KRAKEN_API_URL')
+    loaded = {name for name in ('front', 'graphs') if name in sys.modules}
+    os.environ['KRAKEN_API_URL'] = stand_in.url
+    app_test, runtime, saved = None, None, None
+
+    try:
+        # Modules imported here read the API URL from the environment, while modules imported earlier are pointed at the stand-in
+        import streamlit as st
+        import streamlit.testing.v1.app_test as app_test
+        import graphs
+        import front
+        saved = (graphs.KRAKEN_URL, graphs.KRAKEN_CALL_INTERVAL, front.KRAKEN_URL, front.kraken_pairs, front.option_menu)
+        if front.KRAKEN_URL != stand_in.url:
+            graphs.KRAKEN_URL = front.KRAKEN_URL = stand_in.url
+            front.kraken_pairs = front.get_kraken_pairs()
+        if call_interval is not None:  # By default the calls are spaced out as the app does against the real API
+            graphs.KRAKEN_CALL_INTERVAL = call_interval
+        front.option_menu = scripted_option_menu
+        runtime = app_test.Runtime
+        app_test.Runtime = shared_runtime(runtime)
+        st.cache_data.clear()  # Every load test starts with a cold cache so runs are comparable
+
+        app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), app_path)
+        choices = [stand_in.pairs[i % len(stand_in.pairs)] for i in range(max(sessions, memory_sessions) + 1)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda i: run_session(app_path, choices[i], choices[i + 1], interval, timeout)[:2], range(sessions)))
+        elapsed = time.perf_counter() - start
+        upstream = dict(stand_in.calls)
+        rate_limited = stand_in.rate_limited
+
+        memory = session_memory(app_path, choices, interval, timeout, memory_sessions)
+    finally:
+        if runtime is not None:
+            runtime._instance = None
+            app_test.Runtime = runtime
+
+        # Leave the application as it was found: modules loaded before are restored and modules loaded here are forgotten
+        if saved is not None:
+            graphs.KRAKEN_URL, graphs.KRAKEN_CALL_INTERVAL, front.KRAKEN_URL, front.kraken_pairs, front.option_menu = saved
+            st.cache_data.clear()
+        for name in {'front', 'graphs'} - loaded:
+            sys.modules.pop(name, None)
+        if previous_url is None:
+            os.environ.pop('KRAKEN_API_URL', None)
+        else:
+            os.environ['KRAKEN_API_URL'] = previous_url
+        stand_in.stop()
+
+    latencies = np.array([value for session_latencies, _ in results for value in session_latencies])
+    errors = [error for _, session_errors in results for error in session_errors]
+    return {
+        'sessions': sessions,
+        'concurrency': concurrency,
+        'failed_sessions': sum(1 for _, session_errors in results if session_errors),
+        'errors': sorted(set(errors)),
+        'elapsed_s': elapsed,
+        'sessions_per_s': sessions / elapsed if elapsed else float('nan'),
+        'interactions_per_s': len(latencies) / elapsed if elapsed else float('nan'),
+        'p50_latency_s': float(np.percentile(latencies, 50)) if latencies.size else float('nan'),
+        'p99_latency_s': float(np.percentile(latencies, 99)) if latencies.size else float('nan'),
+        'retained_memory_per_session_mib': memory / 2 ** 20,
+        'upstream_calls': upstream,
+        'rate_limited_calls': rate_limited,
+    }
+
+
+# Reads a command line option that must be a whole number of at least 1
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a whole number of at least 1")
+    return number
+
+
+# Reads the options from the command line, runs the load test and prints the report
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the Streamlit app against a local Kraken stand-in')
+    parser.add_argument('--sessions', type=positive_int, default=20, help='number of simulated user sessions')
+    parser.add_argument('--concurrency', type=positive_int, default=5, help='number of sessions running at the same time')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the stand-in waits before each answer')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='probability of answering with a rate limit error')
+    parser.add_argument('--candles', type=int, default=720, help='number of candles returned by each OHLC request')
+    parser.add_argument('--pairs', type=int, default=50, help='number of pairs listed by AssetPairs')
+    parser.add_argument('--interval', default='1h', help='label of the interval button pressed by every session')
+    parser.add_argument('--timeout', type=float, default=60, help='seconds before a single script run times out')
+    parser.add_argument('--call-interval', type=float, default=None, help='seconds between calls made by the app (default: the app setting)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    # The app prints its own errors, which are sent to the error output so the report can be parsed
+    with contextlib.redirect_stdout(sys.stderr):
+        report = load_test(sessions=args.sessions, concurrency=args.concurrency, latency=args.latency, rate_limit=args.rate_limit,
+                           candles=args.candles, pairs=args.pairs, interval=args.interval, timeout=args.timeout,
+                           call_interval=args.call_interval)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Sessions:            {report['sessions']} ({report['concurrency']} concurrent, {report['failed_sessions']} with errors)")
+    print(f"Throughput:          {report['sessions_per_s']:.2f} sessions/s, {report['interactions_per_s']:.2f} interactions/s")
+    print(f"Latency:             p50 {report['p50_latency_s'] * 1000:.0f} ms, p99 {report['p99_latency_s'] * 1000:.0f} ms")
+    print(f"Memory per session:  {report['retained_memory_per_session_mib']:.2f} MiB retained")
+    print(f"Upstream calls:      {report['upstream_calls']} ({report['rate_limited_calls']} rate limited)")
+    for error in report['errors']:
+        print(f"Error shown:         {error}")
+
+
+# This block runs if the script is executed directly
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,16 @@
 import unittest                         # Import the unittest module for creating test cases
 from front import *                     # Import everything from the 'front' module
 from graphs import aggregate_intervals  # Import the aggregate_intervals function from the 'graphs' module
+from graphs import compact_figure, typed_array, WEBGL_THRESHOLD   # Import the rendering helpers from the 'graphs' module
+import analytics                        # Import the 'analytics' module for cross-pair analysis
+from load_test import KrakenStandIn, load_test  # Import the local Kraken stand-in and the load test runner
+import krakenex                         # Import krakenex to query the stand-in like the app does
 
 import pandas as pd                     # Import the pandas library for data manipulation
+import numpy as np                      # Import the NumPy library for numerical operations
+import base64                           # Import base64 to decode typed arrays
 import plotly.graph_objs as go          # Import the plotly.graph_objs module for creating interactive plots
-from unittest.mock import patch         # Import the patch function for mocking
+from unittest.mock import patch, MagicMock  # Import the patch function and MagicMock for mocking
 
 from math import gcd                    # Import the gcd (greatest common divisor) function from the math module
 
@@ -134,6 +140,194 @@ class TestAggregateIntervals(unittest.TestCase):
             aggregate_intervals(-1, self.df)
 
 
+# Definition of a test case class for testing the compact rendering path of the graphs
+class TestCompactRendering(unittest.TestCase):
+
+    # Builds a DataFrame with the columns used by the graphs and the given number of rows
+    @staticmethod
+    def build_df(periods):
+        close = np.linspace(100, 200, periods)
+        df = pd.DataFrame({'Open': close - 1, 'High': close + 2, 'Low': close - 2, 'Close': close, 'Volume': np.ones(periods),
+                           'SMA': close, 'EMA': close, '%K': np.full(periods, 50.0), '%D': np.full(periods, 50.0)},
+                          index=pd.date_range('2020-01-01', periods=periods, freq='T'))
+        return df
+
+    # Testing that typed_array picks the smallest type that keeps the data readable and leaves other data untouched
+    def test_typed_array(self):
+        dates = typed_array(pd.date_range('2020-01-01', periods=2, freq='T').values)
+        self.assertEqual(dates['dtype'], 'f8')
+        np.testing.assert_array_equal(np.frombuffer(base64.b64decode(dates['bdata']), dtype='f8'), [1577836800000, 1577836860000])
+        self.assertEqual(typed_array(np.array([0, 1, 1]))['dtype'], 'u1')
+        prices = typed_array(np.array([65000.1, 0.00001234, np.nan]))
+        self.assertEqual(prices['dtype'], 'f4')
+        np.testing.assert_allclose(np.frombuffer(base64.b64decode(prices['bdata']), dtype='f4'), [65000.1, 0.00001234, np.nan], rtol=1e-7)
+        self.assertEqual(typed_array(np.array([1e300]))['dtype'], 'f8')
+        self.assertIsNone(typed_array(np.array(['a', 'b'])))
+
+    # Testing that the stochastic thresholds are drawn as shapes and dense series switch to WebGL
+    def test_stochastic_shapes_and_webgl(self):
+        small = Graph.stochastic(self.build_df(10))
+        large = Graph.stochastic(self.build_df(WEBGL_THRESHOLD + 1))
+        self.assertEqual(len(small.data), 2)
+        self.assertEqual([shape.y0 for shape in small.layout.shapes], [20, 80])
+        self.assertEqual({trace.type for trace in small.data}, {'scatter'})
+        self.assertEqual({trace.type for trace in large.data}, {'scattergl'})
+
+    # Testing that compact_figure sends regular timestamps as a start and a step and the rest as typed arrays
+    def test_compact_figure(self):
+        df = self.build_df(5)
+        fig_dict = compact_figure(Graph.candlestick(df))
+        candle, volume = fig_dict['data'][0], fig_dict['data'][1]
+        decoded = np.frombuffer(base64.b64decode(candle['x']['bdata']), dtype='f8')
+        self.assertEqual(decoded[0], df.index[0].timestamp() * 1000)
+        self.assertEqual(candle['open']['dtype'], 'f4')
+        self.assertNotIn('x', volume)
+        self.assertEqual((volume['x0'], volume['dx']), ('2020-01-01T00:00:00.000', 60000))
+        self.assertEqual(volume['marker']['color']['dtype'], 'u1')
+        self.assertEqual(fig_dict['layout']['xaxis']['type'], 'date')
+        self.assertIsInstance(go.Figure(fig_dict), go.Figure)
+
+
+# Definition of a test case class for the calls made to the Kraken API
+class TestQueryPublic(unittest.TestCase):
+
+    # Testing that rate limited calls are retried until they succeed
+    @patch('graphs.KRAKEN_CALL_INTERVAL', 0)
+    def test_retry_on_rate_limit(self):
+        import graphs
+        k = MagicMock()
+        k.query_public.side_effect = [{'error': ['EGeneral:Too many requests']}, {'error': [], 'result': 'ok'}]
+        self.assertEqual(graphs.query_public(k, 'OHLC', {})['result'], 'ok')
+        self.assertEqual(k.query_public.call_count, 2)
+
+    # Testing that other errors and persistent rate limits are returned without further retries
+    @patch('graphs.KRAKEN_CALL_INTERVAL', 0)
+    def test_no_retry(self):
+        import graphs
+        k = MagicMock()
+        k.query_public.return_value = {'error': ['EQuery:Unknown asset pair']}
+        self.assertEqual(graphs.query_public(k, 'OHLC', {})['error'], ['EQuery:Unknown asset pair'])
+        k.query_public.return_value = {'error': ['EAPI:Rate limit exceeded']}
+        graphs.query_public(k, 'OHLC', {})
+        self.assertEqual(k.query_public.call_count, 1 + graphs.KRAKEN_RETRIES + 1)
+
+
+# Definition of a test case class for the 'analytics' module
+class TestAnalytics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        # Set up random close prices for several pairs that can be used across all tests
+        rng = np.random.default_rng(0)
+        self.closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(200, 5)), axis=0))
+        self.returns = analytics.log_returns(self.closes)
+
+    # Testing that align_closes joins pairs with different timestamps on a common grid
+    def test_align_closes(self):
+        first = pd.DataFrame({'Close': [1.0, 2.0, 3.0]}, index=pd.date_range('2020-01-01', periods=3, freq='T'))
+        second = pd.DataFrame({'Close': [10.0, 30.0]}, index=pd.DatetimeIndex(['2020-01-01 00:00', '2020-01-01 00:02']))
+        index, pairs, closes = analytics.align_closes({'A': first, 'B': second, 'C': None}, 1)
+        self.assertEqual(pairs, ['A', 'B'])
+        self.assertEqual(len(index), 3)
+        np.testing.assert_array_equal(closes, [[1, 10], [2, 10], [3, 30]])
+
+        # Without any pair retrieved, the result is empty instead of an error
+        index, pairs, closes = analytics.align_closes({'A': None}, 1)
+        self.assertEqual((len(index), pairs, closes.size), (0, [], 0))
+
+    # Testing that fetch_frames retrieves every pair and reports the ones that failed
+    def test_fetch_frames(self):
+        df = pd.DataFrame({'Close': [1.0]}, index=pd.date_range('2020-01-01', periods=1, freq='T'))
+        frames, failed = analytics.fetch_frames(lambda pair: None if pair == 'B' else df, ['A', 'B', 'C'])
+        self.assertEqual(list(frames), ['A', 'C'])
+        self.assertEqual(failed, ['B'])
+
+    # Testing that rolling_correlation matches the correlation computed by pandas on every window
+    def test_rolling_correlation(self):
+        window, step = 20, 7
+        correlations = analytics.rolling_correlation(self.returns, window, step)
+        ends = range(len(self.returns), window - 1, -step)
+        self.assertEqual(correlations.shape, (len(ends), 5, 5))
+        for correlation, end in zip(correlations[::-1], ends):
+            expected = pd.DataFrame(self.returns[end - window:end]).corr().to_numpy()
+            np.testing.assert_allclose(correlation, expected, atol=1e-12)
+
+    # Testing that relative strength is centred on zero across pairs and dispersion matches NumPy
+    def test_relative_strength_and_dispersion(self):
+        strength = analytics.relative_strength(self.closes, 10)
+        self.assertTrue(np.isnan(strength[:10]).all())
+        np.testing.assert_allclose(strength[10:].sum(axis=1), 0, atol=1e-12)
+        np.testing.assert_allclose(analytics.returns_dispersion(self.returns), self.returns.std(axis=1))
+
+    # Testing that correlation_heatmap returns a heatmap figure
+    def test_correlation_heatmap(self):
+        fig = analytics.correlation_heatmap(np.eye(2), ['A', 'B'])
+        self.assertIsInstance(fig, go.Figure)
+        self.assertEqual(fig.data[0].type, 'heatmap')
+
+
+# Definition of a test case class for the local Kraken stand-in of the load test
+class TestKrakenStandIn(unittest.TestCase):
+
+    # Queries the given public method of a stand-in through krakenex
+    @staticmethod
+    def query(stand_in, method, data=None):
+        k = krakenex.API()
+        k.uri = stand_in.url
+        return k.query_public(method, data)
+
+    # Testing that the stand-in serves OHLC and AssetPairs like Kraken and counts the calls
+    def test_endpoints(self):
+        stand_in = KrakenStandIn(latency=0, candles=10, pairs=5).start()
+        try:
+            pairs = self.query(stand_in, 'AssetPairs')['result']
+            ohlc = self.query(stand_in, 'OHLC', {'pair': 'XETHZUSD', 'interval': 60})['result']['XETHZUSD']
+        finally:
+            stand_in.stop()
+        self.assertEqual(len(pairs), 5)
+        self.assertEqual(len(ohlc), 10)
+        self.assertEqual(ohlc[1][0] - ohlc[0][0], 3600)
+        self.assertEqual(stand_in.calls, {'AssetPairs': 1, 'OHLC': 1})
+
+    # Testing that the stand-in answers with rate limit errors when configured to
+    def test_rate_limit(self):
+        stand_in = KrakenStandIn(latency=0, rate_limit=1).start()
+        try:
+            response = self.query(stand_in, 'OHLC', {'pair': 'XETHZUSD', 'interval': 1})
+        finally:
+            stand_in.stop()
+        self.assertEqual(response['error'], ['EAPI:Rate limit exceeded'])
+        self.assertEqual(stand_in.rate_limited, 1)
+
+    # Testing that a small load test drives headless sessions through the app without errors and restores the app afterwards
+    def test_load_test(self):
+        import front, os
+        url, pairs, environment = front.KRAKEN_URL, front.kraken_pairs, os.environ.get('KRAKEN_API_URL')
+        report = load_test(sessions=2, concurrency=2, latency=0, candles=50, pairs=3, memory_sessions=1, call_interval=0)
+        self.assertEqual(report['failed_sessions'], 0, report['errors'])
+        self.assertGreaterEqual(report['upstream_calls']['OHLC'], 1)
+        self.assertGreater(report['retained_memory_per_session_mib'], 0)
+        self.assertEqual((front.KRAKEN_URL, front.kraken_pairs), (url, pairs))
+        self.assertEqual(os.environ.get('KRAKEN_API_URL'), environment)
+
+    # Testing that the runtime shared by the sessions still exposes every attribute of Streamlit's Runtime to mocks
+    def test_shared_runtime(self):
+        from load_test import shared_runtime
+        from streamlit.runtime import Runtime
+        mock = MagicMock(spec=shared_runtime(Runtime))
+        for name in (name for name in dir(Runtime) if not name.startswith('__')):
+            self.assertTrue(hasattr(mock, name), name)
+        self.assertIsInstance(mock, Runtime)
+
+    # Testing that invalid numbers of sessions are rejected instead of crashing
+    def test_invalid_sessions(self):
+        with self.assertRaises(ValueError):
+            load_test(sessions=0)
+        with self.assertRaises(SystemExit), patch('sys.stderr'):
+            from load_test import main
+            main(['--concurrency', '0'])
+
+
 # This block runs if the script is executed directly
 if __name__ == '__main__':
     unittest.main()  # Running the unittest main function which runs all test methods
\ No newline at end of file